@@ -0,0 +1,72 @@
+import heapq
+import queue
+import threading
+from datetime import date, datetime, time, timezone
+
+_DONE = object()
+
+
+def start_of(event, tz):
+    """Aware start datetime of an API event; all-day events start at midnight in ``tz``."""
+    start = event.get("start", {})
+    if start.get("dateTime"):
+        return datetime.fromisoformat(start["dateTime"].replace("Z", "+00:00"))
+    return datetime.combine(date.fromisoformat(start["date"]), time(), tz)
+
+
+class EventStream:
+    """Time-ordered ``events.list`` for one calendar, paged in on a background thread.
+
+    Only ``prefetch`` pages are buffered ahead of the reader, so a stream
+    never downloads much more than has been displayed.
+    """
+
+    def __init__(self, service_factory, account, calendar_id, time_min, time_max=None,
+                 tz=timezone.utc, page_size=100, prefetch=2):
+        self.account = account
+        self.calendar_id = calendar_id
+        self.tz = tz
+        self.error = None
+        self._pages = queue.Queue(maxsize=prefetch)
+        self._kwargs = {
+            "calendarId": calendar_id,
+            "timeMin": time_min.isoformat(),
+            "singleEvents": True,
+            "orderBy": "startTime",
+            "maxResults": page_size,
+        }
+        if time_max is not None:
+            self._kwargs["timeMax"] = time_max.isoformat()
+        # Daemon thread: a reader that stops early must not keep the process alive
+        self._thread = threading.Thread(target=self._fetch, args=(service_factory,), daemon=True)
+        self._thread.start()
+
+    def _fetch(self, service_factory):
+        try:
+            service = service_factory()
+            page_token = None
+            while True:
+                resp = service.events().list(pageToken=page_token, **self._kwargs).execute()
+                self._pages.put(resp.get("items", []))
+                page_token = resp.get("nextPageToken")
+                if not page_token:
+                    break
+        except Exception as e:
+            self.error = e
+        self._pages.put(_DONE)
+
+    def __iter__(self):
+        while True:
+            page = self._pages.get()
+            if page is _DONE:
+                return
+            for event in page:
+                yield start_of(event, self.tz), self, event
+
+
+def merged(streams):
+    """Lazily k-way merge streams into one chronological ``(start, stream, event)`` sequence.
+
+    The first item is available as soon as every stream has its first page.
+    """
+    return heapq.merge(*streams, key=lambda item: item[0])
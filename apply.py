@@ -0,0 +1,238 @@
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+import styling
+from scheduler import is_throttle
+
+# Calendar API batches accept at most 50 calls
+BATCH_SIZE = 50
+# Private extended properties used to recognise events owned by a desired-state file
+SET_PROPERTY = "gcalManagerSet"
+KEY_PROPERTY = "gcalManagerKey"
+# API field -> EventSpec attribute compared when planning patches
+COMPARED_FIELDS = {"summary": "summary", "location": "location", "description": "description", "colorId": "color_id"}
+
+
+class Change:
+    """One planned API call: an insert, a patch or a delete."""
+
+    __slots__ = ("action", "key", "event_id", "body", "fields")
+
+    def __init__(self, action, key, event_id=None, body=None, fields=()):
+        self.action = action
+        self.key = key
+        self.event_id = event_id
+        self.body = body
+        self.fields = fields
+
+
+def _when(value):
+    """Comparable form of an API ``start``/``end`` dict."""
+    if not value:
+        return None
+    if value.get("dateTime"):
+        return datetime.fromisoformat(value["dateTime"].replace("Z", "+00:00"))
+    return date.fromisoformat(value["date"]) if value.get("date") else None
+
+
+def _local(spec, value):
+    """An occurrence's start/end as an aware datetime in the spec's zone (dates pass through)."""
+    if not isinstance(value, datetime):
+        return value
+    zone = ZoneInfo(spec.time_zone)
+    return value.astimezone(zone) if value.tzinfo else value.replace(tzinfo=zone)
+
+
+def _differences(occurrence, current):
+    spec = occurrence.spec
+    fields = [f for f, attr in COMPARED_FIELDS.items() if (getattr(spec, attr) or None) != (current.get(f) or None)]
+    if _local(spec, occurrence.start) != _when(current.get("start")):
+        fields.append("start")
+    if _local(spec, occurrence.end) != _when(current.get("end")):
+        fields.append("end")
+    return fields
+
+
+def _patch_when(value):
+    # Patch merges nested objects, so clear whichever of date/dateTime is not being set
+    return {"date": None, "dateTime": None, "timeZone": None, **value}
+
+
+def desired_occurrences(entries):
+    """Expand ``(key, EventSpec)`` pairs into ``{occurrence key: Occurrence}``.
+
+    Occurrences are keyed by their local start date (``key@YYYY-MM-DD``), so
+    adding or dropping one date leaves the other occurrences' keys alone.
+    Request bodies are only rendered later, for what ``plan`` has to send.
+    """
+    occurrences = {}
+    for key, spec in entries:
+        for occurrence in spec:
+            start = _local(spec, occurrence.start)
+            local_date = start.date() if isinstance(start, datetime) else start
+            occ_key = f"{key}@{local_date.isoformat()}"
+            if occ_key in occurrences:
+                raise ValueError(
+                    f"Duplicate event key '{occ_key}'. Give each entry a unique 'key' "
+                    "and at most one occurrence per day."
+                )
+            occurrences[occ_key] = occurrence
+    return occurrences
+
+
+def fetch_managed(service, calendar_id, set_name):
+    """Return ``{occurrence key: event}`` for events previously created from ``set_name``."""
+    current = {}
+    page_token = None
+    while True:
+        resp = service.events().list(
+            calendarId=calendar_id,
+            privateExtendedProperty=f"{SET_PROPERTY}={set_name}",
+            singleEvents=True,
+            maxResults=2500,
+            pageToken=page_token,
+        ).execute()
+        for event in resp.get("items", []):
+            key = event.get("extendedProperties", {}).get("private", {}).get(KEY_PROPERTY)
+            if key in current:
+                # A stray duplicate; keep one and let the plan delete the other
+                current[f"{key}~{event['id']}"] = event
+            elif key:
+                current[key] = event
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            return current
+
+
+def plan(set_name, desired, current):
+    """Diff desired occurrences against managed events; only real differences become changes."""
+    changes = []
+    for key, occurrence in desired.items():
+        event = current.get(key)
+        if event is None:
+            body = occurrence.to_body()
+            body["extendedProperties"] = {"private": {SET_PROPERTY: set_name, KEY_PROPERTY: key}}
+            changes.append(Change("insert", key, body=body))
+            continue
+        fields = _differences(occurrence, event)
+        if fields:
+            body = occurrence.to_body()
+            patch = {f: _patch_when(body[f]) if f in ("start", "end") else body[f] for f in fields}
+            changes.append(Change("patch", key, event_id=event["id"], body=patch, fields=tuple(fields)))
+    for key, event in current.items():
+        if key not in desired:
+            changes.append(Change("delete", key, event_id=event["id"], body=event))
+    return changes
+
+
+def format_plan(changes):
+    lines = []
+    for change in changes:
+        body = change.body or {}
+        when = body.get("start", {})
+        when = when.get("dateTime") or when.get("date") or ""
+        if change.action == "insert":
+            lines.append(styling.ok(f"+ {body.get('summary')} {when}"))
+        elif change.action == "patch":
+            lines.append(styling.warn(f"~ {change.key} ({', '.join(change.fields)})"))
+        else:
+            lines.append(styling.err(f"- {body.get('summary')} {when}"))
+    counts = {a: sum(c.action == a for c in changes) for a in ("insert", "patch", "delete")}
+    lines.append(styling.dim(
+        f"Plan: {counts['insert']} to insert, {counts['patch']} to patch, {counts['delete']} to delete."
+    ))
+    return "\n".join(lines)
+
+
+def _request(service, calendar_id, change):
+    events = service.events()
+    if change.action == "insert":
+        return events.insert(calendarId=calendar_id, body=change.body)
+    if change.action == "patch":
+        return events.patch(calendarId=calendar_id, eventId=change.event_id, body=change.body)
+    return events.delete(calendarId=calendar_id, eventId=change.event_id)
+
+
+class _BatchCall:
+    """Scheduler job body for one batch; a retry resends only the throttled items.
+
+    ``changes`` may be a function returning the list, so queued batches don't
+    hold request bodies until they are actually sent.
+    """
+
+    __slots__ = ("calendar_id", "remaining", "failures", "on_done")
+
+    def __init__(self, calendar_id, changes, failures, on_done):
+        self.calendar_id = calendar_id
+        self.remaining = changes
+        self.failures = failures
+        self.on_done = on_done
+
+    def pending(self):
+        if callable(self.remaining):
+            self.remaining = self.remaining()
+        return self.remaining
+
+    def __call__(self, service):
+        throttled = []
+        batch_changes = self.pending()
+
+        def callback(request_id, response, exception):
+            change = batch_changes[int(request_id)]
+            status = getattr(getattr(exception, "resp", None), "status", None)
+            if exception is None or (change.action == "delete" and status in (404, 410)):
+                # An event that is already gone counts as deleted
+                if self.on_done:
+                    self.on_done(change, response)
+            elif is_throttle(exception):
+                throttled.append((change, exception))
+            else:
+                self.failures.append((change, exception))
+
+        batch = service.new_batch_http_request(callback=callback)
+        for i, change in enumerate(batch_changes):
+            batch.add(_request(service, self.calendar_id, change), request_id=str(i))
+        batch.execute()
+
+        self.remaining = [change for change, _ in throttled]
+        if throttled:
+            # Surfacing the throttle lets the scheduler back off and resend what's left
+            raise throttled[0][1]
+
+
+def execute(scheduler, account, calendar_id, changes, on_done=None):
+    """Send ``changes`` as batch requests through ``scheduler``'s lane for ``account``.
+
+    Throttled items are retried with the scheduler's backoff. ``on_done(change,
+    response)`` runs for each successful call. Returns the list of
+    ``(change, error)`` pairs that could not be applied.
+    """
+    failures = []
+    for start in range(0, len(changes), BATCH_SIZE):
+        call = _BatchCall(calendar_id, changes[start:start + BATCH_SIZE], failures, on_done)
+        scheduler.submit(account, call, calendar_id=calendar_id)
+    return _run(scheduler, failures)
+
+
+def insert_all(scheduler, account, calendar_id, spec, on_done=None):
+    """Insert every occurrence of ``spec``, like ``execute`` with one insert each.
+
+    Each batch renders its occurrences' bodies only when it is sent, so a
+    long series never holds more than the in-flight batches in memory. The
+    ``Change.key`` of each insert is its occurrence index.
+    """
+    failures = []
+    for start in range(0, len(spec), BATCH_SIZE):
+        indices = range(start, min(start + BATCH_SIZE, len(spec)))
+        changes = lambda indices=indices: [Change("insert", i, body=spec.to_body(i)) for i in indices]
+        scheduler.submit(account, _BatchCall(calendar_id, changes, failures, on_done), calendar_id=calendar_id)
+    return _run(scheduler, failures)
+
+
+def _run(scheduler, failures):
+    def collect(job):
+        if job.error is not None:
+            # Out of retries (or the batch itself failed): whatever is left didn't apply
+            failures.extend((change, job.error) for change in job.call.pending())
+
+    scheduler.run(on_done=collect)
+    return failures
@@ -0,0 +1,123 @@
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+
+def _coerce(value, all_day: bool):
+    """Turn a parsed occurrence (datetime, date or ISO string) into a date/datetime."""
+    if isinstance(value, str):
+        if all_day:
+            return date.fromisoformat(value[:10])
+        value = datetime.fromisoformat(value)
+    if all_day and isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        # Offsets are stored as absolute seconds, so anchor everything in UTC
+        return value.astimezone(timezone.utc)
+    return value
+
+
+def _seconds(delta):
+    return int(delta.total_seconds())
+
+
+class EventSpec:
+    """One event template plus compact per-occurrence offsets.
+
+    Occurrence ``i`` starts at ``start + start_offsets[i]`` seconds and ends at
+    ``end + end_offsets[i]`` seconds. Offset 0 is the template itself, so a
+    spec with no recurrence holds a single occurrence.
+    """
+
+    __slots__ = (
+        "summary", "start", "end", "all_day", "time_zone",
+        "location", "description", "color_id",
+        "start_offsets", "end_offsets",
+    )
+
+    def __init__(self, summary, start, end, time_zone, location=None, description=None, color_id=None):
+        self.all_day = "T" not in start if isinstance(start, str) else not isinstance(start, datetime)
+        self.summary = summary
+        self.start = _coerce(start, self.all_day)
+        self.end = _coerce(end, self.all_day)
+        self.time_zone = time_zone
+        self.location = location or None
+        self.description = description or None
+        self.color_id = color_id
+        self.start_offsets = array("q", [0])
+        self.end_offsets = array("q", [0])
+
+    @classmethod
+    def from_parsed(cls, summary, start_dict, end_dict, time_zone, location=None, description=None, color_id=None):
+        """Build a spec from two ``format_date_input`` results."""
+        spec = cls(
+            summary, start_dict["date"]["start"], end_dict["date"]["start"], time_zone,
+            location=location, description=description, color_id=color_id,
+        )
+        end_recurrences = end_dict.get("_recurrences", [])
+        for i, start_dt in enumerate(start_dict.get("_recurrences", [])):
+            end_dt = end_recurrences[i] if i < len(end_recurrences) else start_dt
+            spec.add_occurrence(start_dt, end_dt)
+        return spec
+
+    def add_occurrence(self, start, end=None):
+        start = _coerce(start, self.all_day)
+        end = start if end is None else _coerce(end, self.all_day)
+        self.start_offsets.append(_seconds(start - self.start))
+        self.end_offsets.append(_seconds(end - self.end))
+
+    def __len__(self):
+        return len(self.start_offsets)
+
+    def __iter__(self):
+        for i in range(len(self.start_offsets)):
+            yield Occurrence(self, i)
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError("occurrence index out of range")
+        return Occurrence(self, index % len(self))
+
+    def _when(self, value):
+        if self.all_day:
+            return {"date": value.isoformat()}
+        if value.tzinfo is not None:
+            value = value.astimezone(ZoneInfo(self.time_zone))
+        return {"dateTime": value.isoformat(), "timeZone": self.time_zone}
+
+    def to_body(self, index=0):
+        """Render occurrence ``index`` as an ``events.insert`` request body."""
+        occ = self[index]
+        return {
+            "summary": self.summary,
+            "start": self._when(occ.start),
+            "end": self._when(occ.end),
+            "location": self.location,
+            "description": self.description,
+            "colorId": self.color_id,
+        }
+
+
+class Occurrence:
+    """A lightweight view of one occurrence of an ``EventSpec``."""
+
+    __slots__ = ("spec", "index")
+
+    def __init__(self, spec, index):
+        self.spec = spec
+        self.index = index
+
+    @property
+    def start(self):
+        return self.spec.start + timedelta(seconds=self.spec.start_offsets[self.index])
+
+    @property
+    def end(self):
+        return self.spec.end + timedelta(seconds=self.spec.end_offsets[self.index])
+
+    def to_body(self):
+        return self.spec.to_body(self.index)
+
+    def __repr__(self):
+        return f"Occurrence({self.spec.summary!r}, {self.start.isoformat()})"
+
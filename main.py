@@ -1,10 +1,12 @@
 import sys
 import os
+import argparse
 from dotenv import load_dotenv
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.exceptions import RefreshError
-from zoneinfo import ZoneInfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from datetime import datetime, timedelta
 from pathlib import Path
 from google.auth.transport.requests import Request
@@ -14,7 +16,16 @@ import threading
 import time
 import calendar as cal
 import re
+import json
+import sqlite3
 import styling
+from events import EventSpec
+from scheduler import QuotaScheduler
+from sync import sync_calendar
+from watch import NotificationReceiver, WatchSession
+from search import SearchIndex
+from agenda import EventStream, merged
+import apply
 import signal
 
 os.environ['PYTHONUNBUFFERED'] = '1'
@@ -60,7 +71,7 @@ COLOR_MAP = {
 
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
 
-def authenticate(account_name: str):
+def load_credentials(account_name: str):
     gcal_dir = Path("gcal")
     credentials_path = gcal_dir / "credentials.json"
     token_path = gcal_dir / f"token_{account_name}.json"
@@ -89,7 +100,45 @@ def authenticate(account_name: str):
             creds = flow.run_local_server(port=0)
             token_path.write_text(creds.to_json())
     
-    return build("calendar", "v3", credentials=creds)
+    return creds
+
+def authenticate(account_name: str):
+    return build("calendar", "v3", credentials=load_credentials(account_name))
+
+def make_scheduler(account_names):
+    """Build a QuotaScheduler with one lane per account; each worker thread gets its own service."""
+    scheduler = QuotaScheduler()
+    for name in account_names:
+        creds = load_credentials(name)
+        scheduler.add_account(name, lambda creds=creds: build("calendar", "v3", credentials=creds))
+    return scheduler
+
+def print_scheduler_stats(scheduler):
+    """One line per account: how fast its requests went and how often the quota pushed back."""
+    for name, stats in scheduler.stats().items():
+        line = f"{name}: {stats['completed']} request(s) at {stats['throughput']:.1f}/s"
+        if stats["throttled"]:
+            line += f", throttled {stats['throttled']}x"
+        if stats["failed"]:
+            line += f", {stats['failed']} failed"
+        print(styling.dim(f"{line}, concurrency {stats['concurrency']}"))
+
+def list_accounts():
+    return [tok.stem.replace("token_", "") for tok in sorted(Path("gcal").glob("token_*.json"))]
+
+def list_calendars(service):
+    """IDs of every calendar the account can see."""
+    ids = []
+    page_token = None
+    while True:
+        resp = service.calendarList().list(pageToken=page_token).execute()
+        ids.extend(item["id"] for item in resp.get("items", []))
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            return ids
+
+def open_index():
+    return SearchIndex(tz=ZoneInfo(DEFAULT_TZ))
 
 def pick_account():
     gcal_dir = Path("gcal")
@@ -126,13 +175,14 @@ def pick_timezone():
     print(styling.warn("Invalid choice, using default."))
     return DEFAULT_TZ
 
-def format_date_input(user_input: str, tz: ZoneInfo):
+def format_date_input(user_input: str, tz: ZoneInfo, interactive: bool = True, now: datetime = None):
     
     if not user_input.strip():
         return None
 
     parts = user_input.strip().split()
-    now = datetime.now()
+    # Relative words and yearless dates resolve against `now`; files pass a fixed anchor
+    now = now or datetime.now()
     
     def parse_recurrence(parts):
         if not parts:
@@ -190,7 +240,7 @@ def format_date_input(user_input: str, tz: ZoneInfo):
     def parse_end_date(tokens):
         if not tokens:
             return None
-        result = format_date_input(" ".join(tokens), tz=tz)
+        result = format_date_input(" ".join(tokens), tz=tz, interactive=False, now=now)
         start = result["date"]["start"]
         if "T" in start:
             return datetime.fromisoformat(start)
@@ -418,7 +468,7 @@ def format_date_input(user_input: str, tz: ZoneInfo):
 
         raise ValueError("Invalid time. Examples: '14:30', '2:30 PM', '232', '1259', or '232 PM'.")
 
-    if QUICK_ACCESS_TIMES:
+    if interactive and QUICK_ACCESS_TIMES:
         print(f"\n{styling.dim('Choose a time or leave blank for no time:')}")
         for i, t in enumerate(QUICK_ACCESS_TIMES, 1):
             print(f"[{i}] {t}")
@@ -621,36 +671,14 @@ def prompt_event_details(tz):
         color_id = COLOR_MAP.get(label)
 
 
-    start_str = start_dict["date"]["start"]
-    end_str = end_dict["date"]["start"]
-    
-    start_recurrences = start_dict.get("_recurrences", [])
-    end_recurrences = end_dict.get("_recurrences", [])
+    return EventSpec.from_parsed(
+        title, start_dict, end_dict, DEFAULT_TZ,
+        location=location, description=description, color_id=color_id,
+    )
 
-    if "T" in start_str:
-        event_start = {"dateTime": start_str, "timeZone": DEFAULT_TZ}
-        event_end = {"dateTime": end_str, "timeZone": DEFAULT_TZ}
-    else:
-        event_start = {"date": start_str}
-        event_end = {"date": end_str}
-
-    return {
-        "summary": title,
-        "start": event_start,
-        "end": event_end,
-        "location": location or None,
-        "description": description or None,
-        "colorId": color_id,
-        "_start_recurrences": start_recurrences,
-        "_end_recurrences": end_recurrences,
-    }
-
-def add_events(service, event_template):
+def add_events(account_name, spec, calendar_id="primary"):
     """Add event(s) to calendar, handling recurrences."""
-    start_recurrences = event_template.pop("_start_recurrences", [])
-    end_recurrences = event_template.pop("_end_recurrences", [])
-    
-    total = 1 + len(start_recurrences)
+    total = len(spec)
     
     if total > 1:
         print(f"\n{styling.dim(f'This will create {total} events.')}")
@@ -659,55 +687,395 @@ def add_events(service, event_template):
             print(styling.warn("Cancelled."))
             return
     
-    events_created = []
+    links = []
+    index = open_index()
+    
+    def on_done(change, response):
+        index.upsert(account_name, calendar_id, [response])
+        if len(links) < 3:  # Only the first few are shown
+            links.append(response.get('htmlLink'))
+    
+    # Batches of inserts; the scheduler grows concurrency until the account's quota pushes back
+    scheduler = make_scheduler([account_name])
     stop_spinner = spinner(f"Creating {'event' if total == 1 else 'events'}...")
     
     try:
-        # Create first event
-        created = service.events().insert(calendarId="primary", body=event_template).execute()
-        events_created.append(created)
-        
-        # Create recurring events
-        for i, start_dt in enumerate(start_recurrences):
-            end_dt = end_recurrences[i] if i < len(end_recurrences) else start_dt
-            
-            dup_event = dict(event_template)
-            
-            if isinstance(start_dt, datetime):
-                dup_event["start"] = {"dateTime": start_dt.isoformat(), "timeZone": DEFAULT_TZ}
-                dup_event["end"] = {"dateTime": end_dt.isoformat(), "timeZone": DEFAULT_TZ}
-            else:
-                dup_event["start"] = {"date": start_dt}
-                dup_event["end"] = {"date": end_dt}
-            
-            created = service.events().insert(calendarId="primary", body=dup_event).execute()
-            events_created.append(created)
-    
+        failed = apply.insert_all(scheduler, account_name, calendar_id, spec, on_done=on_done)
     finally:
         stop_spinner()
+        index.close()
+    print_scheduler_stats(scheduler)
+    
+    created_count = total - len(failed)
+    if failed:
+        print(styling.err(f"✗ {len(failed)} event(s) failed: {failed[0][1]}"))
     
     # Summary
-    print(f"\n{styling.ok(f'✓ Created {len(events_created)} event(s)!')}")
-    print(f"{styling.dim('Title:')} {event_template['summary']}")
+    first = spec.to_body()
+    print(f"\n{styling.ok(f'✓ Created {created_count} event(s)!')}")
+    print(f"{styling.dim('Title:')} {spec.summary}")
     
-    start = event_template['start'].get('dateTime') or event_template['start'].get('date')
-    end = event_template['end'].get('dateTime') or event_template['end'].get('date')
+    start = first['start'].get('dateTime') or first['start'].get('date')
+    end = first['end'].get('dateTime') or first['end'].get('date')
     print(f"{styling.dim('When:')} {start} → {end}")
     
-    if event_template.get("location"):
-        print(f"{styling.dim('Location:')} {event_template['location']}")
-    if event_template.get("description"):
-        print(f"{styling.dim('Description:')} {event_template['description']}")
-    if event_template.get("colorId"):
-        print(f"{styling.dim('Color ID:')} {event_template['colorId']}")
+    if spec.location:
+        print(f"{styling.dim('Location:')} {spec.location}")
+    if spec.description:
+        print(f"{styling.dim('Description:')} {spec.description}")
+    if spec.color_id:
+        print(f"{styling.dim('Color ID:')} {spec.color_id}")
     
     print(f"\n{styling.dim('Links:')}")
-    for evt in events_created[:3]:  # Show first 3
-        print(f"  {evt.get('htmlLink')}")
-    if len(events_created) > 3:
-        print(f"  {styling.dim(f'... and {len(events_created) - 3} more')}")
+    for link in links:
+        print(f"  {link}")
+    if created_count > 3:
+        print(f"  {styling.dim(f'... and {created_count - 3} more')}")
+
+def describe_change(event):
+    """One-line summary of an event returned by a delta fetch."""
+    if event.get("status") == "cancelled":
+        return styling.warn(f"- removed {event.get('summary') or event['id']}")
+    start = event.get("start", {})
+    when = start.get("dateTime") or start.get("date") or ""
+    return f"{styling.ok('~')} {event.get('summary', '(no title)')} {styling.dim(when)}"
+
+def run_watch(args):
+    """Keep events.watch channels open and print each calendar's delta as pings arrive."""
+    account_name = args.account or pick_account()
+    service = authenticate(account_name)
+    calendars = args.calendar or ["primary"]
+
+    index = open_index()
+
+    # A delta fetch needs a sync token, so do the one-off full sync up front
+    for calendar_id in calendars:
+        if index.sync_token(account_name, calendar_id) is None:
+            stop_spinner = spinner(f"Initial sync of {calendar_id}")
+            try:
+                events = sync_calendar(service, index, account_name, calendar_id)
+            finally:
+                stop_spinner()
+            print(styling.dim(f"{calendar_id}: {len(events)} event(s) synced."))
+
+    def on_change(calendar_id):
+        events = sync_calendar(service, index, account_name, calendar_id)
+        for event in events:
+            print(f"[{calendar_id}] {describe_change(event)}")
+
+    def on_error(calendar_id, exc):
+        print(styling.err(f"[{calendar_id}] {exc} (will retry)"))
+
+    receiver = NotificationReceiver(host=args.host, port=args.port)
+    session = WatchSession(service, args.address, on_change, receiver=receiver, on_error=on_error)
+    for calendar_id in calendars:
+        session.watch(calendar_id)
+
+    host, port = receiver.address
+    print(styling.ok(f"Listening on http://{host}:{port} for {', '.join(calendars)}."))
+    print(styling.dim(f"Google will POST to {args.address}; forward it here. Ctrl-C to stop."))
+    try:
+        session.run()
+    except KeyboardInterrupt:
+        print(f"\n{styling.ok('Channels closed. Goodbye!')}")
+    finally:
+        index.close()
+
+def load_desired_state(path: Path):
+    """Read a desired-state JSON file into ``(set name, calendar id, [(key, EventSpec)])``.
+
+    Each entry's ``start``/``end`` use the same grammar as the interactive
+    prompts (see ``format_date_input``), including recurrence suffixes.
+    Relative and yearless forms resolve against the file's required
+    ``anchor`` date rather than today, so re-applying a file is stable.
+    """
+    data = json.loads(path.read_text())
+    if not isinstance(data, dict) or not isinstance(data.get("events", []), list):
+        raise ValueError("A desired-state file must be a JSON object with an 'events' list.")
+    try:
+        anchor = datetime.strptime(data["anchor"], "%Y-%m-%d")
+    except KeyError:
+        raise ValueError("Desired-state files need an 'anchor' date (YYYY-MM-DD) to resolve dates against.")
+    except (TypeError, ValueError):
+        raise ValueError("'anchor' must be a date in YYYY-MM-DD form.")
+    for field in ("name", "calendar"):
+        if data.get(field) is not None and not isinstance(data[field], str):
+            raise ValueError(f"'{field}' must be a string.")
+    tz_name = data.get("timezone", DEFAULT_TZ)
+    try:
+        tz = ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, TypeError, ValueError):
+        raise ValueError(f"'timezone' must be an IANA time zone like 'America/Los_Angeles', got {tz_name!r}.")
+    colors = {label.lower(): color for label, color in COLOR_MAP.items()}
+
+    entries = []
+    for i, entry in enumerate(data.get("events", []), 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Entry {i}: expected an object, got {type(entry).__name__}.")
+        for field in ("key", "title", "start", "end", "location", "description", "label", "colorId"):
+            if entry.get(field) is not None and not isinstance(entry[field], str):
+                raise ValueError(f"Entry {i}: '{field}' must be a string.")
+        title = (entry.get("title") or "").strip()
+        if not title or not entry.get("start") or not entry.get("end"):
+            raise ValueError(f"Entry {i}: 'title', 'start' and 'end' are required.")
+        try:
+            start_dict = format_date_input(entry["start"], tz=tz, interactive=False, now=anchor)
+            end_dict = format_date_input(entry["end"], tz=tz, interactive=False, now=anchor)
+        except ValueError as e:
+            raise ValueError(f"Entry {i} ({title}): {e}")
+        color_id = entry.get("colorId") or colors.get((entry.get("label") or "").lower())
+        spec = EventSpec.from_parsed(
+            title, start_dict, end_dict, tz_name,
+            location=entry.get("location"), description=entry.get("description"), color_id=color_id,
+        )
+        entries.append((entry.get("key") or title, spec))
+
+    return data.get("name") or path.stem, data.get("calendar", "primary"), entries
+
+def run_apply(args):
+    """Diff a desired-state file against the calendar and send only the needed changes."""
+    set_name, calendar_id, entries = load_desired_state(Path(args.file))
+    desired = apply.desired_occurrences(entries)
+
+    account_name = args.account or pick_account()
+    service = authenticate(account_name)
+
+    stop_spinner = spinner(f"Reading '{set_name}' events from {calendar_id}")
+    try:
+        current = apply.fetch_managed(service, calendar_id, set_name)
+    finally:
+        stop_spinner()
+
+    changes = apply.plan(set_name, desired, current)
+    if not changes:
+        print(styling.ok(f"✓ '{set_name}' is up to date."))
+        return
+    print(f"\n{styling.h(f'Plan for {set_name} ({calendar_id})')}")
+    print(apply.format_plan(changes))
+
+    if args.dry_run:
+        return
+    if not args.yes:
+        confirm = input("\nApply these changes? (y/n): ").strip().lower()
+        if confirm not in ("y", "yes"):
+            print(styling.warn("Cancelled."))
+            return
+
+    index = open_index()
+
+    def on_done(change, response):
+        if change.action == "delete":
+            index.remove(account_name, calendar_id, change.event_id)
+        else:
+            index.upsert(account_name, calendar_id, [response])
+
+    scheduler = make_scheduler([account_name])
+    stop_spinner = spinner(f"Applying {len(changes)} change(s)")
+    try:
+        failures = apply.execute(scheduler, account_name, calendar_id, changes, on_done=on_done)
+    finally:
+        stop_spinner()
+        index.close()
+    print_scheduler_stats(scheduler)
+
+    print(styling.ok(f"✓ Applied {len(changes) - len(failures)} change(s)."))
+    for change, error in failures:
+        print(styling.err(f"✗ {change.action} {change.key}: {error}"))
+
+def run_index(args):
+    """Fetch events into the local search index; later runs only pull what changed."""
+    account_names = args.account or list_accounts()
+    if not account_names:
+        raise ValueError("No accounts found. Run the tool once to add one.")
+
+    # Every calendar of every account is queued at once; the scheduler interleaves
+    # them so each account's quota is used in parallel
+    scheduler = make_scheduler(account_names)
+    with open_index() as index:
+        for account_name in account_names:
+            calendars = args.calendar or list_calendars(authenticate(account_name))
+            for calendar_id in calendars:
+                scheduler.submit(
+                    account_name,
+                    lambda svc, account_name=account_name, calendar_id=calendar_id:
+                        sync_calendar(svc, index, account_name, calendar_id),
+                    calendar_id=calendar_id,
+                )
+
+        def on_done(job):
+            source = f"{job.account}/{job.calendar_id}"
+            if job.error is not None:
+                print(styling.err(f"✗ {source}: {job.error}"))
+            else:
+                print(styling.dim(f"{source}: {len(job.result)} change(s) indexed."))
+
+        stop_spinner = spinner(f"Syncing {scheduler.submitted} calendar(s)")
+        try:
+            scheduler.run(on_done=on_done)
+        finally:
+            stop_spinner()
+    print_scheduler_stats(scheduler)
+
+def search_bound(text, tz, end=False):
+    """Parse a --after/--before value; a bare date covers the whole day.
+
+    Searches look back, so a yearless date like '0301' means its most recent
+    occurrence (today or earlier) instead of rolling into next year.
+    """
+    now = datetime.now()
+    parts = text.split()
+    if parts and re.match(r"^(\d{3,4}|\d{1,2}-\d{1,2})$", parts[0]):
+        # format_date_input picks the first match on/after `now`; start that window a year back
+        try:
+            year_ago = now.replace(year=now.year - 1)
+        except ValueError:  # Feb 29
+            year_ago = now.replace(year=now.year - 1, day=28)
+        now = year_ago + timedelta(days=1)
+    start = format_date_input(text, tz=tz, interactive=False, now=now)["date"]["start"]
+    if "T" in start:
+        return datetime.fromisoformat(start)
+    day = datetime.fromisoformat(start).replace(tzinfo=tz)
+    return day + timedelta(days=1) if end else day
+
+def run_search(args):
+    tz = ZoneInfo(DEFAULT_TZ)
+    after = search_bound(args.after, tz) if args.after else None
+    before = search_bound(args.before, tz, end=True) if args.before else None
+
+    with open_index() as index:
+        rows = index.search(" ".join(args.query), after=after, before=before,
+                            accounts=args.account, limit=args.limit)
+
+    if not rows:
+        print(styling.warn("No matching events."))
+        return
+    for row in rows:
+        line = f"{styling.dim(row['start'])}  {row['summary'] or '(no title)'}"
+        if row["location"]:
+            line += f" {styling.dim('@ ' + row['location'])}"
+        account = row["account"]
+        print(f"{line}  {styling.dim(f'[{account}]')}")
+
+def run_agenda(args):
+    """Show upcoming events from every account and calendar as one chronological list."""
+    tz = ZoneInfo(DEFAULT_TZ)
+    account_names = args.account or list_accounts()
+    if not account_names:
+        raise ValueError("No accounts found. Run the tool once to add one.")
+
+    now = datetime.now(tz)
+    time_max = now + timedelta(days=args.days) if args.days else None
+
+    streams = []
+    for account_name in account_names:
+        creds = load_credentials(account_name)
+        factory = lambda creds=creds: build("calendar", "v3", credentials=creds)
+        calendars = args.calendar or list_calendars(factory())
+        for calendar_id in calendars:
+            # Each stream starts paging in its own thread right away
+            streams.append(EventStream(factory, account_name, calendar_id, now, time_max, tz=tz))
+
+    stop_spinner = spinner(f"Loading {len(streams)} calendar(s)")
+    index = open_index()
+    shown = 0
+    seen = set()
+    current_day = None
+    try:
+        for start, stream, event in merged(streams):
+            if stop_spinner:
+                stop_spinner()
+                stop_spinner = None
+
+            # Calendars shared between accounts would otherwise show the same event twice
+            dedup_key = (event.get("iCalUID") or event["id"], start)
+            if dedup_key in seen:
+                continue
+            seen.add(dedup_key)
+            index.upsert(stream.account, stream.calendar_id, [event])
+
+            local = start.astimezone(tz)
+            if local.date() != current_day:
+                current_day = local.date()
+                print(f"\n{styling.h(local.strftime('%a %b %d, %Y'))}")
+            when = "all day" if "date" in event.get("start", {}) else local.strftime("%H:%M")
+            source = f"{stream.account}/{stream.calendar_id}"
+            print(f"  {when:>7}  {event.get('summary', '(no title)')}  {styling.dim(f'[{source}]')}")
+
+            shown += 1
+            if shown % args.page == 0:
+                index.commit()
+                more = input(styling.dim("Enter for more, q to quit: ")).strip().lower()
+                if more in ("q", "quit"):
+                    break
+    finally:
+        if stop_spinner:
+            stop_spinner()
+        index.close()
+
+    if not shown:
+        print(styling.warn("No upcoming events."))
+    for stream in streams:
+        if stream.error is not None:
+            print(styling.err(f"✗ {stream.account}/{stream.calendar_id}: {stream.error}"))
+
+def positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive whole number, got '{value}'")
+    return number
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Manage Google Calendar(s) from the terminal.")
+    sub = parser.add_subparsers(dest="command")
+
+    watch_parser = sub.add_parser("watch", help="Refresh on push notifications instead of polling.")
+    watch_parser.add_argument("address", help="Public HTTPS URL that forwards to the local receiver.")
+    watch_parser.add_argument("--account", help="Account name (token_<name>.json); prompts if omitted.")
+    watch_parser.add_argument("--calendar", action="append", help="Calendar ID to watch (repeatable, default: primary).")
+    watch_parser.add_argument("--host", default="127.0.0.1", help="Interface for the local receiver.")
+    watch_parser.add_argument("--port", type=int, default=8080, help="Port for the local receiver.")
+
+    apply_parser = sub.add_parser("apply", help="Sync a desired-state file to a calendar with minimal changes.")
+    apply_parser.add_argument("file", help="Desired-state JSON file.")
+    apply_parser.add_argument("--account", help="Account name (token_<name>.json); prompts if omitted.")
+    apply_parser.add_argument("--dry-run", action="store_true", help="Show the plan without changing anything.")
+    apply_parser.add_argument("-y", "--yes", action="store_true", help="Apply without asking for confirmation.")
+
+    index_parser = sub.add_parser("index", help="Fetch events into the local search index.")
+    index_parser.add_argument("--account", action="append", help="Account to index (repeatable, default: all).")
+    index_parser.add_argument("--calendar", action="append", help="Calendar ID (repeatable, default: all calendars).")
+
+    search_parser = sub.add_parser("search", help="Search indexed events offline.")
+    search_parser.add_argument("query", nargs="*", help="Words to match in title, description or location (prefixes work).")
+    search_parser.add_argument("--after", help="Only events starting on/after this date (e.g. 2024-03-01, or 0301 for the latest Mar 1).")
+    search_parser.add_argument("--before", help="Only events starting on/before this date.")
+    search_parser.add_argument("--account", action="append", help="Limit to an account (repeatable).")
+    search_parser.add_argument("--limit", type=positive_int, default=50, help="Maximum results (default: 50).")
+
+    agenda_parser = sub.add_parser("agenda", help="Upcoming events from all accounts in one list.")
+    agenda_parser.add_argument("--account", action="append", help="Account to include (repeatable, default: all).")
+    agenda_parser.add_argument("--calendar", action="append", help="Calendar ID (repeatable, default: all calendars).")
+    agenda_parser.add_argument("--days", type=positive_int, help="Only show the next N days.")
+    agenda_parser.add_argument("--page", type=positive_int, default=20, help="Events per screen (default: 20).")
+
+    return parser.parse_args(argv)
 
 def main():
+    args = parse_args(sys.argv[1:])
+    commands = {"watch": run_watch, "apply": run_apply, "index": run_index, "search": run_search, "agenda": run_agenda}
+    if args.command in commands:
+        try:
+            commands[args.command](args)
+        except (ValueError, OSError, sqlite3.Error, HttpError) as e:
+            print(styling.err(str(e)))
+            sys.exit(1)
+        except KeyboardInterrupt:
+            print(f"\n{styling.ok('Goodbye!')}")
+        return
+
     # Pick timezone once at start
     while True:
         try:
@@ -729,7 +1097,7 @@ def main():
     while True:
         try:
             account_name = pick_account()
-            service = authenticate(account_name)
+            load_credentials(account_name)  # Sign in now rather than at the first insert
             break
         except KeyboardInterrupt:
             try:
@@ -745,8 +1113,8 @@ def main():
 
     while True:
         try:
-            event = prompt_event_details(tz)
-            add_events(service, event)
+            spec = prompt_event_details(tz)
+            add_events(account_name, spec)
 
             again = input(
                 f"\n{styling.dim('Add another? (y = same account / s = switch account / n = quit):')} "
@@ -756,7 +1124,7 @@ def main():
                 continue
             elif again in ("s", "switch"):
                 account_name = pick_account()
-                service = authenticate(account_name)
+                load_credentials(account_name)
             else:
                 print(styling.ok("Done."))
                 break
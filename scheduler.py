@@ -0,0 +1,219 @@
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Error reasons Google returns alongside 403s when a quota, not a permission, is the problem
+RATE_LIMIT_REASONS = (b"rateLimitExceeded", b"userRateLimitExceeded", b"quotaExceeded")
+
+
+def is_throttle(exc):
+    """True if ``exc`` is an HttpError telling us to slow down (429, or a rate-limit 403)."""
+    status = getattr(getattr(exc, "resp", None), "status", None)
+    if status == 429:
+        return True
+    if status == 403:
+        content = getattr(exc, "content", b"") or b""
+        return any(reason in content for reason in RATE_LIMIT_REASONS)
+    return False
+
+
+class Job:
+    """One queued unit of work. ``call`` receives a service, makes the API call(s) and returns the result."""
+
+    __slots__ = ("index", "account", "calendar_id", "call", "attempts", "result", "error", "callback_error")
+
+    def __init__(self, index, account, calendar_id, call):
+        self.index = index
+        self.account = account
+        self.calendar_id = calendar_id
+        self.call = call
+        self.attempts = 0
+        self.result = None
+        self.error = None
+        self.callback_error = None
+
+
+class AccountLane:
+    """Per-account queues plus the AIMD state that decides how many calls may be in flight.
+
+    Jobs are queued per calendar and taken round-robin, so one calendar's
+    backlog doesn't hold up writes to the account's other calendars.
+    """
+
+    __slots__ = (
+        "name", "service_factory", "queues", "limit", "in_flight", "streak",
+        "resume_at", "completed", "throttled", "failed", "started_at", "finished_at",
+    )
+
+    def __init__(self, name, service_factory):
+        self.name = name
+        self.service_factory = service_factory
+        self.queues = OrderedDict()
+        self.limit = 1
+        self.in_flight = 0
+        self.streak = 0
+        self.resume_at = 0.0
+        self.completed = 0
+        self.throttled = 0
+        self.failed = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def push(self, job, front=False):
+        queue = self.queues.setdefault(job.calendar_id, deque())
+        if front:
+            queue.appendleft(job)
+            self.queues.move_to_end(job.calendar_id, last=False)
+        else:
+            queue.append(job)
+
+    def pop(self):
+        calendar_id, queue = next(iter(self.queues.items()))
+        job = queue.popleft()
+        if queue:
+            self.queues.move_to_end(calendar_id)
+        else:
+            del self.queues[calendar_id]
+        return job
+
+    def ready(self, now):
+        return bool(self.queues) and self.in_flight < self.limit and now >= self.resume_at
+
+    def on_success(self, max_concurrency):
+        # Additive increase: one more slot after a full window of clean responses
+        self.completed += 1
+        self.streak += 1
+        if self.streak >= self.limit:
+            self.limit = min(self.limit + 1, max_concurrency)
+            self.streak = 0
+
+    def on_throttle(self, attempt):
+        # Multiplicative decrease, plus a jittered exponential pause for the whole lane
+        self.throttled += 1
+        self.streak = 0
+        now = time.monotonic()
+        if now < self.resume_at:
+            # Other in-flight calls already triggered this backoff; halve only once per episode
+            return
+        self.limit = max(1, self.limit // 2)
+        delay = min(32.0, 2 ** attempt) + random.random()
+        self.resume_at = now + delay
+
+    def throughput(self):
+        """Observed successful calls per second since the lane's first dispatch."""
+        if self.started_at is None or not self.finished_at or self.finished_at <= self.started_at:
+            return 0.0
+        return self.completed / (self.finished_at - self.started_at)
+
+
+class QuotaScheduler:
+    """Run queued calendar writes across several accounts without idling any account's quota.
+
+    Each account gets its own lane with an AIMD concurrency limit driven by the
+    403/429 responses it sees. The dispatcher round-robins over lanes, so one
+    throttled account backs off while the others keep going.
+    """
+
+    def __init__(self, max_concurrency=8, max_retries=5):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.lanes = {}
+        self.submitted = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    def add_account(self, name, service_factory):
+        """Register an account. ``service_factory`` must return a fresh service on each call."""
+        if name not in self.lanes:
+            self.lanes[name] = AccountLane(name, service_factory)
+        return self.lanes[name]
+
+    def submit(self, account, call, calendar_id=None):
+        if account not in self.lanes:
+            raise ValueError(f"Unknown account '{account}'.")
+        job = Job(self.submitted, account, calendar_id, call)
+        self.submitted += 1
+        self.lanes[account].push(job)
+        return job
+
+    def _service(self, lane):
+        # googleapiclient services are not thread-safe, so each worker builds its own
+        services = getattr(self._local, "services", None)
+        if services is None:
+            services = self._local.services = {}
+        if lane.name not in services:
+            services[lane.name] = lane.service_factory()
+        return services[lane.name]
+
+    def _execute(self, lane, job, on_done):
+        try:
+            job.attempts += 1
+            job.result = job.call(self._service(lane))
+            job.error = None
+        except Exception as e:
+            job.error = e
+
+        with self._cond:
+            try:
+                lane.in_flight -= 1
+                lane.finished_at = time.monotonic()
+                if job.error is None:
+                    lane.on_success(self.max_concurrency)
+                elif is_throttle(job.error) and job.attempts <= self.max_retries:
+                    lane.on_throttle(job.attempts)
+                    lane.push(job, front=True)
+                    return
+                else:
+                    lane.failed += 1
+                if on_done:
+                    try:
+                        on_done(job)
+                    except Exception as e:
+                        job.callback_error = e
+            finally:
+                # run() sleeps on this condition; it must hear about every finished call
+                self._cond.notify_all()
+
+    def run(self, on_done=None):
+        """Drain every lane.
+
+        Finished jobs are not kept, so results reach the caller only through
+        ``on_done(job)``, called (under the scheduler lock) as each job
+        finishes, successfully or not; failed jobs carry ``job.error``. An
+        exception raised by ``on_done`` is stored on ``job.callback_error``.
+        """
+        total_slots = self.max_concurrency * max(1, len(self.lanes))
+        with ThreadPoolExecutor(max_workers=total_slots) as pool:
+            with self._cond:
+                while any(lane.queues or lane.in_flight for lane in self.lanes.values()):
+                    now = time.monotonic()
+                    dispatched = False
+                    # One job per ready lane per pass keeps the accounts interleaved
+                    for lane in self.lanes.values():
+                        if lane.ready(now):
+                            job = lane.pop()
+                            lane.in_flight += 1
+                            if lane.started_at is None:
+                                lane.started_at = now
+                            pool.submit(self._execute, lane, job, on_done)
+                            dispatched = True
+                    if dispatched:
+                        continue
+
+                    waits = [lane.resume_at - now for lane in self.lanes.values()
+                             if lane.queues and lane.resume_at > now]
+                    self._cond.wait(timeout=min(waits) if waits else None)
+
+    def stats(self):
+        return {
+            name: {
+                "completed": lane.completed,
+                "throttled": lane.throttled,
+                "failed": lane.failed,
+                "concurrency": lane.limit,
+                "throughput": lane.throughput(),
+            }
+            for name, lane in self.lanes.items()
+        }
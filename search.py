@@ -0,0 +1,209 @@
+import sqlite3
+import threading
+from datetime import date, datetime, time, timezone
+from pathlib import Path
+
+INDEX_PATH = Path("gcal") / "index.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    account TEXT NOT NULL,
+    calendar_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    summary TEXT,
+    description TEXT,
+    location TEXT,
+    start TEXT,
+    end TEXT,
+    start_ts INTEGER,
+    link TEXT,
+    UNIQUE (account, calendar_id, event_id)
+);
+CREATE INDEX IF NOT EXISTS events_start_ts ON events (start_ts);
+
+-- Delta-sync position per calendar; lives with the rows it describes, so a
+-- fresh or deleted index always starts from a full sync
+CREATE TABLE IF NOT EXISTS sync_tokens (
+    account TEXT NOT NULL,
+    calendar_id TEXT NOT NULL,
+    token TEXT NOT NULL,
+    PRIMARY KEY (account, calendar_id)
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+    summary, description, location,
+    content='events', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS events_ai AFTER INSERT ON events BEGIN
+    INSERT INTO events_fts (rowid, summary, description, location)
+    VALUES (new.id, new.summary, new.description, new.location);
+END;
+CREATE TRIGGER IF NOT EXISTS events_ad AFTER DELETE ON events BEGIN
+    INSERT INTO events_fts (events_fts, rowid, summary, description, location)
+    VALUES ('delete', old.id, old.summary, old.description, old.location);
+END;
+CREATE TRIGGER IF NOT EXISTS events_au AFTER UPDATE ON events BEGIN
+    INSERT INTO events_fts (events_fts, rowid, summary, description, location)
+    VALUES ('delete', old.id, old.summary, old.description, old.location);
+    INSERT INTO events_fts (rowid, summary, description, location)
+    VALUES (new.id, new.summary, new.description, new.location);
+END;
+"""
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 query where every word is a quoted prefix term."""
+    terms = [word.replace('"', '""') for word in text.split()]
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+class SearchIndex:
+    """Local full-text index of events the tool has created or fetched.
+
+    Writes are not committed until ``commit()`` (or leaving the ``with``
+    block), so bulk syncs cost a single transaction. ``tz`` anchors all-day
+    events when turning them into timestamps for date-range filters.
+    """
+
+    def __init__(self, path=INDEX_PATH, tz=timezone.utc):
+        self.tz = tz
+        self._lock = threading.Lock()
+        # A fresh checkout has no gcal/ yet; sqlite won't create the directory
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Scheduler callbacks arrive on worker threads; the lock serialises them
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _timestamp(self, when):
+        if when.get("dateTime"):
+            return int(datetime.fromisoformat(when["dateTime"].replace("Z", "+00:00")).timestamp())
+        if when.get("date"):
+            return int(datetime.combine(date.fromisoformat(when["date"]), time(), self.tz).timestamp())
+        return None
+
+    def upsert(self, account, calendar_id, events):
+        """Index API event resources; cancelled ones are removed instead."""
+        with self._lock:
+            self._upsert(account, calendar_id, events)
+
+    def _upsert(self, account, calendar_id, events):
+        for event in events:
+            if event.get("status") == "cancelled":
+                self.conn.execute(
+                    "DELETE FROM events WHERE account = ? AND calendar_id = ? AND event_id = ?",
+                    (account, calendar_id, event["id"]),
+                )
+                continue
+            start = event.get("start", {})
+            end = event.get("end", {})
+            self.conn.execute(
+                """
+                INSERT INTO events (account, calendar_id, event_id, summary, description,
+                                    location, start, end, start_ts, link)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (account, calendar_id, event_id) DO UPDATE SET
+                    summary = excluded.summary, description = excluded.description,
+                    location = excluded.location, start = excluded.start, end = excluded.end,
+                    start_ts = excluded.start_ts, link = excluded.link
+                """,
+                (
+                    account, calendar_id, event["id"],
+                    event.get("summary"), event.get("description"), event.get("location"),
+                    start.get("dateTime") or start.get("date"),
+                    end.get("dateTime") or end.get("date"),
+                    self._timestamp(start), event.get("htmlLink"),
+                ),
+            )
+
+    def remove(self, account, calendar_id, event_id):
+        with self._lock:
+            self.conn.execute(
+                "DELETE FROM events WHERE account = ? AND calendar_id = ? AND event_id = ?",
+                (account, calendar_id, event_id),
+            )
+
+    def sync_token(self, account, calendar_id):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT token FROM sync_tokens WHERE account = ? AND calendar_id = ?",
+                (account, calendar_id),
+            ).fetchone()
+        return row["token"] if row else None
+
+    def set_sync_token(self, account, calendar_id, token):
+        with self._lock:
+            self._set_sync_token(account, calendar_id, token)
+
+    def _set_sync_token(self, account, calendar_id, token):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sync_tokens (account, calendar_id, token) VALUES (?, ?, ?)",
+            (account, calendar_id, token),
+        )
+
+    def apply_sync(self, account, calendar_id, events, token, replace=False):
+        """Store one fetch result and its sync token in a single transaction.
+
+        With ``replace`` the calendar's existing rows are dropped first, as a
+        full sync has to be: events deleted while the old token was invalid
+        would otherwise linger in the index.
+        """
+        with self._lock:
+            try:
+                if replace:
+                    self.conn.execute(
+                        "DELETE FROM events WHERE account = ? AND calendar_id = ?",
+                        (account, calendar_id),
+                    )
+                self._upsert(account, calendar_id, events)
+                if token:
+                    self._set_sync_token(account, calendar_id, token)
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+
+    def search(self, text="", after=None, before=None, accounts=None, limit=50):
+        """Return matching rows ordered by start time.
+
+        ``after``/``before`` are aware datetimes (``before`` is exclusive).
+        Every word in ``text`` is matched as a prefix; empty text matches all.
+        """
+        sql = "SELECT e.* FROM events e"
+        clauses, params = [], []
+        if text.strip():
+            sql += " JOIN events_fts f ON f.rowid = e.id"
+            clauses.append("events_fts MATCH ?")
+            params.append(match_expression(text))
+        if after is not None:
+            clauses.append("e.start_ts >= ?")
+            params.append(int(after.timestamp()))
+        if before is not None:
+            clauses.append("e.start_ts < ?")
+            params.append(int(before.timestamp()))
+        if accounts:
+            clauses.append(f"e.account IN ({', '.join('?' for _ in accounts)})")
+            params.extend(accounts)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY e.start_ts LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def commit(self):
+        with self._lock:
+            self.conn.commit()
+
+    def close(self):
+        self.commit()
+        self.conn.close()
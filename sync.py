@@ -0,0 +1,47 @@
+from googleapiclient.errors import HttpError
+
+
+def fetch_changes(service, calendar_id, sync_token=None):
+    """Fetch events changed since ``sync_token`` (or every event if it is None).
+
+    Returns ``(events, next_sync_token, full)``. Cancelled events are included
+    with ``status == "cancelled"`` so callers can drop them. An expired token
+    (410) falls back to a full sync; ``full`` is True whenever the result is a
+    full listing, which may omit events deleted since the last sync, so the
+    caller must replace its local copy rather than merge into it.
+    """
+    events = []
+    page_token = None
+    while True:
+        kwargs = {
+            "calendarId": calendar_id,
+            "singleEvents": True,
+            "showDeleted": True,
+            "maxResults": 2500,
+        }
+        if sync_token:
+            kwargs["syncToken"] = sync_token
+        if page_token:
+            kwargs["pageToken"] = page_token
+        try:
+            resp = service.events().list(**kwargs).execute()
+        except HttpError as e:
+            if e.resp.status == 410 and sync_token:
+                return fetch_changes(service, calendar_id, None)
+            raise
+        events.extend(resp.get("items", []))
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            return events, resp.get("nextSyncToken"), not sync_token
+
+
+def sync_calendar(service, index, account_name: str, calendar_id="primary"):
+    """Pull the delta for one calendar into ``index`` and store its new sync token.
+
+    The token is kept in the index itself, so a calendar the index has never
+    seen always gets a full sync. A full sync replaces the calendar's rows.
+    """
+    token = index.sync_token(account_name, calendar_id)
+    events, next_token, full = fetch_changes(service, calendar_id, token)
+    index.apply_sync(account_name, calendar_id, events, next_token, replace=full)
+    return events
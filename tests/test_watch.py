@@ -0,0 +1,96 @@
+import time
+import unittest
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from watch import CHANNEL_TTL_SECONDS, Channel, NotificationReceiver, WatchSession
+
+
+class NotificationReceiverTest(unittest.TestCase):
+    """Drive the receiver with local POSTs shaped like Google's callbacks."""
+
+    def setUp(self):
+        self.receiver = NotificationReceiver(port=0)
+        self.receiver.register(Channel("chan-1", "res-1", "primary", "secret", time.time() + CHANNEL_TTL_SECONDS))
+        self.receiver.start()
+        self.addCleanup(self.receiver.stop)
+
+    def ping(self, token, state, channel_id="chan-1"):
+        host, port = self.receiver.address
+        request = Request(f"http://{host}:{port}/", data=b"", method="POST", headers={
+            "X-Goog-Channel-ID": channel_id,
+            "X-Goog-Channel-Token": token,
+            "X-Goog-Resource-State": state,
+        })
+        try:
+            with urlopen(request) as resp:
+                return resp.status
+        except HTTPError as e:
+            return e.code
+
+    def test_sync_handshake_is_not_a_change(self):
+        self.assertEqual(self.ping("secret", "sync"), 200)
+        self.assertEqual(self.receiver.wait(timeout=0.1), set())
+
+    def test_unknown_channel_or_token_is_rejected(self):
+        self.assertEqual(self.ping("wrong", "exists"), 404)
+        self.assertEqual(self.ping("secret", "exists", channel_id="chan-2"), 404)
+        self.assertEqual(self.receiver.wait(timeout=0.1), set())
+
+    def test_pings_for_one_calendar_collapse(self):
+        self.assertEqual(self.ping("secret", "exists"), 200)
+        self.assertEqual(self.ping("secret", "exists"), 200)
+        self.assertEqual(self.receiver.wait(timeout=1), {"primary"})
+        self.assertEqual(self.receiver.wait(timeout=0.1), set())
+
+
+class _WatchCall:
+    """Stands in for ``events().watch(...)``; ``execute`` runs Google's side of the handshake."""
+
+    def __init__(self, body, handshake):
+        self.body = body
+        self.handshake = handshake
+
+    def execute(self):
+        self.handshake(self.body)
+        return {"id": self.body["id"], "resourceId": "res-1", "expiration": str(int((time.time() + 3600) * 1000))}
+
+
+class FakeService:
+    def __init__(self, handshake):
+        self.handshake = handshake
+
+    def events(self):
+        return self
+
+    def watch(self, calendarId, body):
+        return _WatchCall(body, self.handshake)
+
+
+class WatchSessionTest(unittest.TestCase):
+    def setUp(self):
+        self.receiver = NotificationReceiver(port=0)
+        self.addCleanup(self.receiver.stop)
+
+    def test_sync_handshake_reaches_a_registered_channel(self):
+        accepted = []
+        service = FakeService(lambda body: accepted.append(self.receiver.notify(body["id"], body["token"], "sync")))
+        session = WatchSession(service, "https://example.invalid/notify", on_change=None, receiver=self.receiver)
+        channel = session.watch("primary")
+        self.assertEqual(accepted, [True])
+        self.assertEqual(channel.resource_id, "res-1")
+        self.assertIs(self.receiver.channels[channel.id], channel)
+
+    def test_failed_watch_unregisters_the_channel(self):
+        def refuse(body):
+            raise OSError("watch refused")
+
+        session = WatchSession(FakeService(refuse), "https://example.invalid/notify", on_change=None, receiver=self.receiver)
+        with self.assertRaises(OSError):
+            session.watch("primary")
+        self.assertEqual(self.receiver.channels, {})
+        self.assertEqual(session.channels, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
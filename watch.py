@@ -0,0 +1,254 @@
+import secrets
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Google caps events.watch channels at about a week; renew well before they lapse
+CHANNEL_TTL_SECONDS = 7 * 24 * 3600
+RENEW_MARGIN_SECONDS = 3600
+# Failed delta fetches or renewals are retried with capped exponential backoff
+RETRY_MAX_SECONDS = 300
+
+
+class Channel:
+    """An open ``events.watch`` channel for one calendar."""
+
+    __slots__ = ("id", "resource_id", "calendar_id", "token", "expiration")
+
+    def __init__(self, id, resource_id, calendar_id, token, expiration):
+        self.id = id
+        self.resource_id = resource_id
+        self.calendar_id = calendar_id
+        self.token = token
+        self.expiration = expiration  # epoch seconds
+
+    @classmethod
+    def new(cls, calendar_id):
+        """A channel with a fresh id and token, not yet opened with Google."""
+        return cls(str(uuid.uuid4()), None, calendar_id, secrets.token_urlsafe(16), None)
+
+    def due_for_renewal(self, now=None):
+        now = time.time() if now is None else now
+        return now >= self.expiration - RENEW_MARGIN_SECONDS
+
+
+def open_channel(service, channel, address, ttl=CHANNEL_TTL_SECONDS):
+    """Ask Google to POST changes to ``channel.calendar_id`` to ``address``.
+
+    Fills in the channel's resource id and expiration and returns it.
+    """
+    body = {
+        "id": channel.id,
+        "type": "web_hook",
+        "address": address,
+        "token": channel.token,
+        "params": {"ttl": str(ttl)},
+    }
+    resp = service.events().watch(calendarId=channel.calendar_id, body=body).execute()
+    channel.resource_id = resp["resourceId"]
+    # Expiration comes back as milliseconds since the epoch, as a string
+    channel.expiration = int(resp.get("expiration", 0)) / 1000 or time.time() + ttl
+    return channel
+
+
+def close_channel(service, channel):
+    service.channels().stop(body={"id": channel.id, "resourceId": channel.resource_id}).execute()
+
+
+class NotificationReceiver:
+    """Local HTTP endpoint for ``events.watch`` callbacks.
+
+    The request handler only records which calendar changed and answers
+    right away; repeated pings for the same calendar collapse into one entry
+    until ``wait()`` hands them to the caller.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.channels = {}
+        self._pending = set()
+        self._cond = threading.Condition()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def register(self, channel):
+        with self._cond:
+            self.channels[channel.id] = channel
+
+    def unregister(self, channel_id):
+        with self._cond:
+            self.channels.pop(channel_id, None)
+
+    def notify(self, channel_id, token, state):
+        """Record a ping. Returns False if the channel or token is unknown."""
+        with self._cond:
+            channel = self.channels.get(channel_id)
+            if channel is None or not secrets.compare_digest(channel.token or "", token or ""):
+                return False
+            # "sync" is the handshake sent when a channel opens; nothing changed yet
+            if state != "sync":
+                self._pending.add(channel.calendar_id)
+                self._cond.notify_all()
+            return True
+
+    def wait(self, timeout=None):
+        """Block until at least one calendar changed (or ``timeout``); return and clear them."""
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(timeout=timeout)
+            changed, self._pending = self._pending, set()
+            return changed
+
+    def _make_handler(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                accepted = receiver.notify(
+                    self.headers.get("X-Goog-Channel-ID"),
+                    self.headers.get("X-Goog-Channel-Token"),
+                    self.headers.get("X-Goog-Resource-State"),
+                )
+                self.send_response(200 if accepted else 404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+
+class WatchSession:
+    """Keeps channels open for a set of calendars and runs ``on_change`` per ping.
+
+    All API calls (delta fetches via ``on_change`` and channel renewals) happen
+    on the thread that calls ``run()``, so a single service object is enough.
+    Errors from either are passed to ``on_error(calendar_id, exc)``; the
+    calendar stays pending and is retried with backoff instead of stopping
+    the session.
+    """
+
+    def __init__(self, service, address, on_change, receiver=None, on_error=None):
+        self.service = service
+        self.address = address
+        self.on_change = on_change
+        self.on_error = on_error
+        self.receiver = receiver or NotificationReceiver()
+        self.channels = {}  # calendar id -> Channel
+        self._failures = {}  # calendar id -> consecutive failures
+        self._fetch_retry_at = {}  # calendar id -> monotonic time to retry its delta fetch
+        self._renew_retry_at = {}  # calendar id -> monotonic time to retry its renewal
+
+    def _failed(self, retry_at, calendar_id, exc):
+        count = self._failures.get(calendar_id, 0) + 1
+        self._failures[calendar_id] = count
+        retry_at[calendar_id] = time.monotonic() + min(RETRY_MAX_SECONDS, 2 ** count)
+        if self.on_error:
+            self.on_error(calendar_id, exc)
+
+    def watch(self, calendar_id):
+        # Google sends the "sync" handshake before events.watch returns, so the
+        # receiver must already be listening for this channel's id and token
+        self.receiver.start()
+        channel = Channel.new(calendar_id)
+        self.receiver.register(channel)
+        try:
+            open_channel(self.service, channel, self.address)
+        except Exception:
+            self.receiver.unregister(channel.id)
+            raise
+        self.channels[calendar_id] = channel
+        return channel
+
+    def renew_due(self, now=None):
+        """Replace channels close to expiry; the old one is stopped once the new one is live."""
+        renewed = []
+        for calendar_id, old in list(self.channels.items()):
+            if not old.due_for_renewal(now) or self._renew_retry_at.get(calendar_id, 0) > time.monotonic():
+                continue
+            try:
+                self.watch(calendar_id)
+            except Exception as e:
+                self._failed(self._renew_retry_at, calendar_id, e)
+                continue
+            self._renew_retry_at.pop(calendar_id, None)
+            self.receiver.unregister(old.id)
+            try:
+                close_channel(self.service, old)
+            except Exception:
+                pass  # It expires on its own shortly anyway
+            renewed.append(calendar_id)
+        return renewed
+
+    def next_renewal_in(self):
+        if not self.channels:
+            return None
+        soonest = min(c.expiration for c in self.channels.values()) - RENEW_MARGIN_SECONDS
+        return max(0.0, soonest - time.time())
+
+    def _next_wake(self, timeout):
+        waits = [] if timeout is None else [timeout]
+        renew_in = self.next_renewal_in()
+        if renew_in is not None:
+            # A renewal that failed waits out its backoff rather than spinning
+            if self._renew_retry_at:
+                renew_in = max(renew_in, min(self._renew_retry_at.values()) - time.monotonic())
+            waits.append(renew_in)
+        if self._fetch_retry_at:
+            waits.append(min(self._fetch_retry_at.values()) - time.monotonic())
+        return max(0.0, min(waits)) if waits else None
+
+    def run_once(self, timeout=None):
+        changed = self.receiver.wait(timeout=self._next_wake(timeout))
+        now = time.monotonic()
+        for calendar_id, retry_at in list(self._fetch_retry_at.items()):
+            if retry_at <= now:
+                del self._fetch_retry_at[calendar_id]
+                changed.add(calendar_id)
+        for calendar_id in sorted(changed):
+            if calendar_id in self._fetch_retry_at:
+                continue  # Still backing off; the pending retry covers this ping too
+            try:
+                self.on_change(calendar_id)
+            except Exception as e:
+                self._failed(self._fetch_retry_at, calendar_id, e)
+                continue
+            self._failures.pop(calendar_id, None)
+        self.renew_due()
+
+    def run(self):
+        try:
+            while True:
+                self.run_once()
+        finally:
+            self.close()
+
+    def close(self):
+        for channel in self.channels.values():
+            try:
+                close_channel(self.service, channel)
+            except Exception:
+                pass
+        self.channels.clear()
+        self.receiver.stop()
+